@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 
 import os
+import codecs
+import logging
 from collections import deque
+from itertools import chain
 import csv
 import re
 import datetime
@@ -9,6 +12,9 @@ import sys
 import platform
 import subprocess
 import json
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 import datetime
 import dateutil
@@ -16,6 +22,7 @@ from timeit import default_timer as timer
 from bento.common.utils import get_host, DATETIME_FORMAT, reformat_date, get_time_stamp
 
 from neo4j import Driver
+from neo4j.exceptions import Neo4jError
 
 from icdc_schema import ICDC_Schema, is_parent_pointer, get_list_values
 from bento.common.utils import get_logger, NODES_CREATED, RELATIONSHIP_CREATED, UUID, \
@@ -37,7 +44,23 @@ RELATIONSHIPS = 'relationships'
 INT_NODE_CREATED = 'int_node_created'
 PROVIDED_PARENTS = 'provided_parents'
 RELATIONSHIP_PROPS = 'relationship_properties'
+# Constraint types that make a single property unique, NODE_PROPERTY_UNIQUENESS is used by newer Neo4j versions
+UNIQUENESS_CONSTRAINT_TYPES = {'UNIQUENESS', 'NODE_PROPERTY_UNIQUENESS', 'NODE_KEY'}
 BATCH_SIZE = 1000
+# Number of rows sent to Neo4j in one UNWIND statement
+UNWIND_BATCH_SIZE = 10000
+# Number of node rows loaded in each transaction in split transactions mode
+TRANSACTION_SIZE = 20000
+# Buffer size used to read data files
+READ_BUFFER_SIZE = 1024 * 1024
+# Column types of input data
+NODE_PROPERTY = 'node_property'
+PARENT_POINTER = 'parent_pointer'
+RELATIONSHIP_PROPERTY = 'relationship_property'
+TRUE_PATTERN = re.compile(r'yes|true', re.IGNORECASE)
+FALSE_PATTERN = re.compile(r'no|false', re.IGNORECASE)
+# Translation table that removes NUL characters, csv module can't parse them before Python 3.11
+REMOVE_NUL = str.maketrans('', '', '\x00')
 
 
 def get_btree_indexes(session):
@@ -54,6 +77,20 @@ def get_btree_indexes(session):
             indexes.add(format_as_tuple(r["labelsOrTypes"][0], r["properties"]))
     return indexes
 
+def get_uniqueness_constraints(session):
+    """
+    Queries the database to get all existing uniqueness constraints on a single property
+    :param session: the current neo4j session
+    :return: A set of tuples representing all existing uniqueness constraints in the database
+    """
+    command = "SHOW CONSTRAINTS"
+    result = session.run(command)
+    constraints = set()
+    for r in result:
+        if r["type"] in UNIQUENESS_CONSTRAINT_TYPES and len(r["properties"]) == 1:
+            constraints.add(format_as_tuple(r["labelsOrTypes"][0], r["properties"]))
+    return constraints
+
 def format_as_tuple(node_name, properties):
     """
     Format index info as a tuple
@@ -119,10 +156,16 @@ def backup_neo4j(backup_dir, name, address, log):
 def check_encoding(file_name):
     utf8 = 'utf-8'
     windows1252 = 'windows-1252'
+    # Decode raw chunks instead of reading lines, there is no need to split or keep the content
+    decoder = codecs.getincrementaldecoder(utf8)()
     try:
-        with open(file_name, encoding=utf8) as file:
-            for _ in file.readlines():
-                pass
+        with open(file_name, 'rb', buffering=0) as file:
+            while True:
+                chunk = file.read(READ_BUFFER_SIZE)
+                if not chunk:
+                    break
+                decoder.decode(chunk)
+            decoder.decode(b'', final=True)
         return utf8
     except UnicodeDecodeError:
         return windows1252
@@ -145,6 +188,8 @@ class DataLoader:
         if not schema or not isinstance(schema, ICDC_Schema):
             raise Exception('Invalid ICDC_Schema object')
         self.log = get_logger('Data Loader')
+        # Checked once, so per row debug messages are not formatted unless debug logging is enabled
+        self.debug_enabled = self.log.isEnabledFor(logging.DEBUG)
         self.driver = driver
         self.schema = schema
         self.rel_prop_delimiter = self.schema.rel_prop_delimiter
@@ -168,6 +213,7 @@ class DataLoader:
         self.nodes_updated = 0
         self.relationships_created = 0
         self.indexes_created = 0
+        self.constraints_created = 0
         self.nodes_deleted = 0
         self.relationships_deleted = 0
         self.nodes_stat = {}
@@ -175,6 +221,12 @@ class DataLoader:
         self.nodes_deleted_stat = {}
         self.relationships_deleted_stat = {}
         self.validation_result_file_key = ""
+        self.file_encodings = {}
+        self.column_info = {}
+        # Internal ids of nodes loaded by current load, keyed by (node_type, node_id)
+        self.node_ids = {}
+        # Statistics are shared by all workers when loading files in parallel
+        self.stats_lock = threading.Lock()
 
     def check_files(self, file_list):
         if not file_list:
@@ -187,6 +239,21 @@ class DataLoader:
                     return False
             return True
 
+    def open_data_file(self, file_name):
+        """
+        Open a data file for reading with a large buffer, encoding of the file is only detected once
+        :param file_name: data file to open
+        :return: file object
+        """
+        stat = os.stat(file_name)
+        # Include size and modification time in the key, so files replaced on disk will be checked again
+        key = (file_name, stat.st_size, stat.st_mtime_ns)
+        file_encoding = self.file_encodings.get(key)
+        if not file_encoding:
+            file_encoding = check_encoding(file_name)
+            self.file_encodings[key] = file_encoding
+        return open(file_name, encoding=file_encoding, buffering=READ_BUFFER_SIZE, newline='')
+
     def validate_files(self, cheat_mode, file_list, max_violations, temp_folder, verbose):
         if not cheat_mode:
             validation_failed = False
@@ -217,7 +284,7 @@ class DataLoader:
             return True
 
     def load(self, file_list, cheat_mode, dry_run, loading_mode, wipe_db, max_violations, temp_folder, verbose,
-             split=False, no_backup=True, backup_folder="/", neo4j_uri=None):
+             split=False, no_backup=True, backup_folder="/", neo4j_uri=None, workers=1):
         if not self.check_files(file_list):
             return False
         start = timer()
@@ -243,6 +310,7 @@ class DataLoader:
         self.nodes_updated = 0
         self.relationships_created = 0
         self.indexes_created = 0
+        self.constraints_created = 0
         self.nodes_deleted = 0
         self.relationships_deleted = 0
         self.nodes_stat = {}
@@ -250,37 +318,41 @@ class DataLoader:
         self.relationships_stat = {}
         self.nodes_deleted_stat = {}
         self.relationships_deleted_stat = {}
+        self.node_ids = {}
         if not self.driver or not isinstance(self.driver, Driver):
             self.log.error('Invalid Neo4j Python Driver!')
             return False
         # Data updates and schema related updates cannot be performed in the same session so multiple will be created
         # Create new session for schema related updates (index creation)
+        # Each schema update runs in its own transaction, so a failed uniqueness constraint can fall back to an index
         with self.driver.session() as session:
-            tx = session.begin_transaction()
             try:
-                self.create_indexes(tx)
-                tx.commit()
+                self.create_indexes(session)
+                workers = self.get_workers(session, file_list, workers, split)
             except Exception as e:
-                tx.rollback()
                 self.log.exception(e)
                 return False
-        # Create new session for data related updates
-        with self.driver.session() as session:
-            # Split Transactions enabled
-            if split:
-                self._load_all(session, file_list, loading_mode, split, wipe_db)
+        # Split Transactions enabled, load files in parallel, each worker uses its own session
+        if workers > 1:
+            self._load_all_parallel(file_list, loading_mode, wipe_db, workers)
+        else:
+            # Create new session for data related updates
+            with self.driver.session() as session:
+                # Split Transactions enabled
+                if split:
+                    self._load_all(session, file_list, loading_mode, split, wipe_db)
 
-            # Split Transactions Disabled
-            else:
-                # Data updates transaction
-                tx = session.begin_transaction()
-                try:
-                    self._load_all(tx, file_list, loading_mode, split, wipe_db)
-                    tx.commit()
-                except Exception as e:
-                    tx.rollback()
-                    self.log.exception(e)
-                    return False
+                # Split Transactions Disabled
+                else:
+                    # Data updates transaction
+                    tx = session.begin_transaction()
+                    try:
+                        self._load_all(tx, file_list, loading_mode, split, wipe_db)
+                        tx.commit()
+                    except Exception as e:
+                        tx.rollback()
+                        self.log.exception(e)
+                        return False
 
         # End the timer
         end = timer()
@@ -302,6 +374,7 @@ class DataLoader:
             count = self.relationships_stat[rel]
             self.log.info('Relationship: [:{}] loaded: {}'.format(rel, count))
         self.log.info('{} new indexes created!'.format(self.indexes_created))
+        self.log.info('{} new constraints created!'.format(self.constraints_created))
         self.log.info('{} nodes and {} relationships loaded!'.format(self.nodes_created, self.relationships_created))
         self.log.info('{} nodes and {} relationships deleted!'.format(self.nodes_deleted, self.relationships_deleted))
         self.log.info('{} nodes updated!'.format(self.nodes_updated, self.relationships_deleted))
@@ -318,39 +391,157 @@ class DataLoader:
             for txt in file_list:
                 self.load_relationships(tx, txt, loading_mode, split)
 
-    # Remove extra spaces at beginning and end of the keys and values
-    @staticmethod
-    def cleanup_node(node):
-        return {key if not key else key.strip(): value if not value else value.strip() for key, value in node.items()}
+    def get_workers(self, session, file_list, workers, split):
+        """
+        Check if files can be loaded in parallel, 1 worker is used otherwise
+        :param session: the current neo4j session
+        :param file_list: list of data files to load
+        :param workers: number of workers requested
+        :param split: split-transactions mode
+        :return: number of workers to use
+        """
+        if workers <= 1:
+            return 1
+        if not split:
+            self.log.warning('Loading files in parallel requires split transactions mode, use 1 worker instead!')
+            return 1
+        # Plugins create nodes inside each worker's open transaction, workers could block each other on them
+        if self.plugins:
+            self.log.warning('Loading files in parallel is not supported with plugins, use 1 worker instead!')
+            return 1
+        # Workers merging the same id at the same time would both create a node, unless the id field is unique
+        constraints = get_uniqueness_constraints(session)
+        missing = []
+        for node_type in sorted(self.get_node_types(file_list)):
+            id_field = self.schema.get_id_field({NODE_TYPE: node_type})
+            if format_as_tuple(node_type, id_field) not in constraints:
+                missing.append('(:{} {{ {} }})'.format(node_type, id_field))
+        if missing:
+            self.log.warning('Loading files in parallel requires uniqueness constraints on id fields, missing for {}, '
+                             'use 1 worker instead!'.format(', '.join(missing)))
+            return 1
+        return workers
+
+    def get_node_types(self, file_list):
+        """
+        Get node types of data files, each data file holds one type of nodes, so only first rows are read
+        :param file_list: list of data files
+        :return: set of node types
+        """
+        node_types = set()
+        for txt in file_list:
+            with self.open_data_file(txt) as in_file:
+                for _, row in self.read_data_file(in_file):
+                    if row.get(NODE_TYPE):
+                        node_types.add(row[NODE_TYPE])
+                    break
+        return node_types
+
+    def _load_all_parallel(self, file_list, loading_mode, wipe_db, workers):
+        """
+        Load nodes in split transactions mode with a pool of workers, each worker loads one file at a time
+        Only nodes are loaded in parallel, they are sent in managed transactions that are retried on deadlocks.
+        Relationships (and deletions) lock nodes shared by many files, so they are loaded by one session afterwards
+        """
+        with self.driver.session() as session:
+            if wipe_db:
+                self.wipe_db(session, True)
+            if loading_mode == DELETE_MODE:
+                for txt in file_list:
+                    self.load_nodes(session, txt, loading_mode, True)
+                return
+        self.log.info(f'Loading nodes with {workers} workers')
+        self._run_in_parallel(self.load_nodes, file_list, loading_mode, workers)
+        with self.driver.session() as session:
+            for txt in file_list:
+                self.load_relationships(session, txt, loading_mode, True)
 
+    def _run_in_parallel(self, load_file, file_list, loading_mode, workers):
+        # Start with the largest files, so workers don't end up waiting for one big file that was queued last
+        file_list = sorted(file_list, key=os.path.getsize, reverse=True)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self._load_file_in_session, load_file, txt, loading_mode) for txt in file_list]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except Exception:
+                # Don't start loading files that are still waiting, let running workers finish their current file
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _load_file_in_session(self, load_file, file_name, loading_mode):
+        # Sessions are not thread safe, every worker opens its own session
+        with self.driver.session() as session:
+            load_file(session, file_name, loading_mode, True)
+
+    def read_data_file(self, in_file):
+        """
+        Read rows from an opened data (TSV/TXT) file, header is only parsed and stripped once
+        Values beyond the columns in header are ignored with a warning
+        :param in_file: opened data file
+        :return: generator of (line number, row) tuples, line numbers count rows after the header, starting from 2.
+                 Extra spaces at beginning and end of the keys and values of rows (dict) are removed
+        """
+        # Values are passed to Neo4j as parameters, so only NUL characters need to be removed from the input
+        lines = (line.translate(REMOVE_NUL) if '\x00' in line else line for line in in_file)
+        reader = csv.reader(lines, delimiter='\t')
+        header = next(reader, None)
+        if header is None:
+            return
+        # Keys are shared by all rows of the file, intern them so dict lookups and hashing of keys are cheaper
+        header = [sys.intern(key.strip()) for key in header]
+        header_len = len(header)
+        line_num = 1
+        for row in reader:
+            # Skip empty lines, same as csv.DictReader
+            if not row:
+                continue
+            line_num += 1
+            values = [value.strip() for value in row]
+            # Skip rows that only have empty or whitespace values, e.g. lines with tabs only
+            if not any(values):
+                continue
+            # Missing values at the end of a row are None, same as csv.DictReader
+            if len(values) < header_len:
+                values.extend([None] * (header_len - len(values)))
+            elif len(values) > header_len and any(values[header_len:]):
+                self.log.warning('Line: {}: {} value(s) found after the last column "{}", ignored: {}'.format(
+                    line_num, len(values) - header_len, header[-1], values[header_len:]))
+            yield line_num, dict(zip(header, values))
+
+    # Remove extra spaces at beginning and end of the keys and values, unless they are already stripped
     # Cleanup values for Boolean, Int and Float types
     # Add uuid to nodes if one not exists
     # Add parent id(s)
     # Add extra properties for "value with unit" properties
-    def prepare_node(self, node):
-        obj = self.cleanup_node(node)
+    def prepare_node(self, node, stripped=False):
+        if stripped:
+            # Rows from read_data_file are already stripped, update them in place instead of making a copy
+            obj = node
+        else:
+            obj = {key if not key else key.strip(): value if not value else value.strip()
+                   for key, value in node.items()}
 
         node_type = obj.get(NODE_TYPE, None)
         # Cleanup values for Boolean, Int and Float types
         if node_type:
             for key, value in obj.items():
-                search_node_type = node_type
-                search_key = key
-                if is_parent_pointer(key):
-                    search_node_type, search_key = key.split('.')
-                elif self.schema.is_relationship_property(key):
-                    search_node_type, search_key = key.split(self.rel_prop_delimiter)
+                column_type, search_node_type, search_key = self.get_column_info(key)
+                if column_type == NODE_PROPERTY:
+                    search_node_type = node_type
 
                 key_type = self.schema.get_prop_type(search_node_type, search_key)
                 if key_type == 'Boolean':
                     cleaned_value = None
                     if isinstance(value, str):
-                        if re.search(r'yes|true', value, re.IGNORECASE):
+                        if TRUE_PATTERN.search(value):
                             cleaned_value = True
-                        elif re.search(r'no|false', value, re.IGNORECASE):
+                        elif FALSE_PATTERN.search(value):
                             cleaned_value = False
                         else:
-                            self.log.debug('Unsupported Boolean value: "{}"'.format(value))
+                            if self.debug_enabled:
+                                self.log.debug('Unsupported Boolean value: "{}"'.format(value))
                             cleaned_value = None
                     obj[key] = cleaned_value
                 elif key_type == 'Int':
@@ -386,17 +577,14 @@ class DataLoader:
         for key, value in obj.items():
             obj2[key] = value
             # Add parent id field(s) into node
-            if obj[NODE_TYPE] in self.schema.props.save_parent_id and is_parent_pointer(key):
-                header = key.split('.')
-                if len(header) > 2:
-                    self.log.warning('Column header "{}" has multiple periods!'.format(key))
-                field_name = header[1]
-                parent = header[0]
+            column_type, parent, field_name = self.get_column_info(key)
+            if obj[NODE_TYPE] in self.schema.props.save_parent_id and column_type == PARENT_POINTER:
                 combined = '{}_{}'.format(parent, field_name)
                 if field_name in obj:
-                    self.log.debug(
-                        '"{}" field is in both current node and parent "{}", use {} instead !'.format(key, parent,
-                                                                                                      combined))
+                    if self.debug_enabled:
+                        self.log.debug(
+                            '"{}" field is in both current node and parent "{}", use {} instead !'.format(key, parent,
+                                                                                                          combined))
                     field_name = combined
                 # Add an value for parent id
                 obj2[field_name] = value
@@ -406,7 +594,7 @@ class DataLoader:
 
         if UUID not in obj2:
             id_field = self.schema.get_id_field(obj2)
-            id_value = self.schema.get_id(obj2)
+            id_value = self.schema.get_id(obj2, id_field)
             node_type = obj2.get(NODE_TYPE)
             if node_type:
                 if not id_value:
@@ -418,11 +606,30 @@ class DataLoader:
 
         return obj2
 
+    def get_column_info(self, key):
+        """
+        Classify a column (key) of input data, results are cached, so regular expressions only run once per column
+        :param key: column name
+        :return: tuple of (column type, node or relationship name, property name), name is None for node properties
+        """
+        info = self.column_info.get(key)
+        if info is None:
+            if is_parent_pointer(key):
+                parent, _, field_name = key.partition('.')
+                info = (PARENT_POINTER, parent, field_name)
+            elif self.schema.is_relationship_property(key):
+                rel_name, _, prop_name = key.partition(self.rel_prop_delimiter)
+                info = (RELATIONSHIP_PROPERTY, rel_name, prop_name)
+            else:
+                info = (NODE_PROPERTY, None, key)
+            self.column_info[key] = info
+        return info
+
     def get_signature(self, node):
         result = []
         for key in sorted(node.keys()):
             value = node[key]
-            if not is_parent_pointer(key):
+            if self.get_column_info(key)[0] != PARENT_POINTER:
                 result.append('{}: {}'.format(key, value))
         return '{{ {} }}'.format(', '.join(result))
 
@@ -432,16 +639,12 @@ class DataLoader:
             self.log.error('Invalid Neo4j Python Driver!')
             return False
         with self.driver.session() as session:
-            file_encoding = check_encoding(file_name)
-            with open(file_name, encoding=file_encoding) as in_file:
+            with self.open_data_file(file_name) as in_file:
                 self.log.info('Validating relationships in file "{}" ...'.format(file_name))
-                reader = csv.DictReader(in_file, delimiter='\t')
-                line_num = 1
                 validation_failed = False
                 violations = 0
-                for org_obj in reader:
-                    obj = self.prepare_node(org_obj)
-                    line_num += 1
+                for line_num, org_obj in self.read_data_file(in_file):
+                    obj = self.prepare_node(org_obj, True)
                     # Validate parent exist
                     if CASE_ID in obj:
                         case_id = obj[CASE_ID]
@@ -461,16 +664,12 @@ class DataLoader:
             self.log.error('Invalid Neo4j Python Driver!')
             return False
         with self.driver.session() as session:
-            file_encoding = check_encoding(file_name)
-            with open(file_name, encoding=file_encoding) as in_file:
+            with self.open_data_file(file_name) as in_file:
                 self.log.info('Validating relationships in file "{}" ...'.format(file_name))
-                reader = csv.DictReader(in_file, delimiter='\t')
-                line_num = 1
                 validation_failed = False
                 violations = 0
-                for org_obj in reader:
-                    line_num += 1
-                    obj = self.prepare_node(org_obj)
+                for line_num, org_obj in self.read_data_file(in_file):
+                    obj = self.prepare_node(org_obj, True)
                     results = self.collect_relationships(obj, session, False, line_num)
                     relationships = results[RELATIONSHIPS]
                     provided_parents = results[PROVIDED_PARENTS]
@@ -495,58 +694,50 @@ class DataLoader:
         node = {}
 
         for key, value in obj.items():
-            if is_parent_pointer(key):
-                continue
-            elif self.schema.is_relationship_property(key):
-                continue
-            else:
+            if self.get_column_info(key)[0] == NODE_PROPERTY:
                 node[key] = value
 
         return node
 
-    # Validate the field names
-    def validate_field_name(self, file_name, df_validation_dict):
+    # Validate the field names, using first row of the file
+    def validate_field_name(self, file_name, row, df_validation_dict):
         df_validation_result = pd.DataFrame(columns=['File Name', 'Property', 'Value', 'Reason', 'Line Numbers', 'Severity'])
-        file_encoding = check_encoding(file_name)
-        with open(file_name, encoding=file_encoding) as in_file:
-            reader = csv.DictReader(in_file, delimiter='\t')
-            row = next(reader)
-            row = self.cleanup_node(row)
-            row_prepare_node = self.prepare_node(row)
-            parent_pointer = []
-            for key in row_prepare_node.keys():
-                if is_parent_pointer(key):
-                    parent_pointer.append(key)
-            error_list = []
-            parent_error_list = []
-            for key in row.keys():
-                if key not in parent_pointer:
-                    try:
-                        if key not in self.schema.get_props_for_node(row['type']) and key != 'type':
-                            error_list.append(key)
-                    except:
+        row_prepare_node = self.prepare_node(row)
+        parent_pointer = []
+        for key in row_prepare_node.keys():
+            if self.get_column_info(key)[0] == PARENT_POINTER:
+                parent_pointer.append(key)
+        error_list = []
+        parent_error_list = []
+        for key in row.keys():
+            if key not in parent_pointer:
+                try:
+                    if key not in self.schema.get_props_for_node(row['type']) and key != 'type':
                         error_list.append(key)
-                else:
-                    try:
-                        if key.split('.')[1] not in self.schema.get_props_for_node(key.split('.')[0]):
-                            parent_error_list.append(key)
-                    except:
+                except:
+                    error_list.append(key)
+            else:
+                try:
+                    _, parent, field_name = self.get_column_info(key)
+                    if field_name not in self.schema.get_props_for_node(parent):
                         parent_error_list.append(key)
-            if len(error_list) > 0:
-                for error_field_name in error_list:
-                    self.log.warning('Property: "{}" not found in data model'.format(error_field_name))
-                    df_validation_result = self.update_field_validation_result(df_validation_result, file_name, error_field_name, "property_not_found_in_model", "warning")
-            if len(parent_error_list) > 0:
-                for parent_error_field_name in parent_error_list:
-                    self.log.error('Parent pointer: "{}" not found in data model'.format(parent_error_field_name))
-                    df_validation_result = self.update_field_validation_result(df_validation_result, file_name, parent_error_field_name, "parent_pointer_not_found_in_model", "error")
-                if len(df_validation_result) > 0:
-                    if row[NODE_TYPE] not in df_validation_dict.keys():
-                        df_validation_dict[row[NODE_TYPE]] = df_validation_result
-                    else:
-                        df_validation_dict[row[NODE_TYPE]] = pd.concat([df_validation_dict[row[NODE_TYPE]], df_validation_result])
-                self.log.error('Parent pointer not found in the data model, abort loading!')
-                return False, df_validation_dict
+                except:
+                    parent_error_list.append(key)
+        if len(error_list) > 0:
+            for error_field_name in error_list:
+                self.log.warning('Property: "{}" not found in data model'.format(error_field_name))
+                df_validation_result = self.update_field_validation_result(df_validation_result, file_name, error_field_name, "property_not_found_in_model", "warning")
+        if len(parent_error_list) > 0:
+            for parent_error_field_name in parent_error_list:
+                self.log.error('Parent pointer: "{}" not found in data model'.format(parent_error_field_name))
+                df_validation_result = self.update_field_validation_result(df_validation_result, file_name, parent_error_field_name, "parent_pointer_not_found_in_model", "error")
+            if len(df_validation_result) > 0:
+                if row[NODE_TYPE] not in df_validation_dict.keys():
+                    df_validation_dict[row[NODE_TYPE]] = df_validation_result
+                else:
+                    df_validation_dict[row[NODE_TYPE]] = pd.concat([df_validation_dict[row[NODE_TYPE]], df_validation_result])
+            self.log.error('Parent pointer not found in the data model, abort loading!')
+            return False, df_validation_dict
         if len(df_validation_result) > 0:
             if row[NODE_TYPE] not in df_validation_dict.keys():
                     df_validation_dict[row[NODE_TYPE]] = df_validation_result
@@ -564,32 +755,36 @@ class DataLoader:
         return df_validation_result
     # Validate file
     def validate_file(self, file_name, max_violations, df_validation_dict, verbose):
-        file_encoding = check_encoding(file_name)
-        with open(file_name, encoding=file_encoding) as in_file:
+        with self.open_data_file(file_name) as in_file:
             self.log.info('Validating file "{}" ...'.format(file_name))
-            reader = csv.DictReader(in_file, delimiter='\t')
-            line_num = 1
             validation_failed = False
             violations = 0
             ids = {}
             df_validation_result = pd.DataFrame(columns=['File Name', 'Property', 'Value', 'Reason', 'Line Numbers', 'Severity'])
-            field_validation_result, df_validation_dict = self.validate_field_name(file_name, df_validation_dict)
+            rows = self.read_data_file(in_file)
+            first_row = next(rows, None)
+            if first_row is None:
+                self.log.warning('File "{}" has no data'.format(file_name))
+                return True, df_validation_dict
+            field_validation_result, df_validation_dict = self.validate_field_name(file_name, first_row[1],
+                                                                                   df_validation_dict)
             if not field_validation_result:
                 return False, df_validation_dict
-            df_invalid = pd.DataFrame(columns=['invalid_properties', 'invalid_values', 'invalid_reason', 'invalid_line_num', 'node_type'])
-            df_missing = pd.DataFrame(columns=['missing_properties', 'missing_reason', 'missing_line_num', 'node_type'])
+            # Validation results are collected column by column, data frames are only built once per file
+            invalid = {'invalid_properties': [], 'invalid_values': [], 'invalid_reason': [], 'invalid_line_num': [],
+                       'node_type': []}
+            missing = {'missing_properties': [], 'missing_reason': [], 'missing_line_num': [], 'node_type': []}
             df_duplicate_id = pd.DataFrame(columns=['duplicate_id', 'duplicate_reason', 'duplicate_id_field', 'duplicate_line_num', 'node_type'])
             duplicate_id = []
             duplicate_reason = []
             duplicate_line_num = []
             duplicate_node_type = []
             duplicate_id_field = []
-            for org_obj in reader:
-                obj = self.cleanup_node(org_obj)
+            # Field names are validated from the first row, all rows are validated in the same pass
+            for line_num, obj in chain([first_row], rows):
                 props = self.get_node_properties(obj)
-                line_num += 1
                 id_field = self.schema.get_id_field(obj)
-                node_id = self.schema.get_id(obj)
+                node_id = self.schema.get_id(obj, id_field)
 
                 if node_id:
                     if node_id in ids:
@@ -607,9 +802,10 @@ class DataLoader:
                         else:
                             # Same ID exists in same file, but properties are also same, probably it's pointing same
                             # object to multiple parents
-                            self.log.debug(
-                                f'Duplicated data at line {line_num}: duplicate {id_field}: {node_id}, found in line: '
-                                f'{", ".join(ids[node_id]["lines"])}')
+                            if self.debug_enabled:
+                                self.log.debug(
+                                    f'Duplicated data at line {line_num}: duplicate {id_field}: {node_id}, found in '
+                                    f'line: {", ".join(ids[node_id]["lines"])}')
                             duplicate_id.append(node_id)
                             duplicate_reason.append('many_to_many')
                             duplicate_line_num.append(line_num)
@@ -619,28 +815,19 @@ class DataLoader:
                         ids[node_id] = {'props': get_props_signature(props), 'lines': [str(line_num)]}
 
                 validate_result = self.schema.validate_node(obj[NODE_TYPE], obj, verbose)
-                try:
-                    if len(validate_result['invalid_properties']) > 0:
-                        tmp_df_invalid = pd.DataFrame()
-                        tmp_df_invalid['invalid_properties'] = validate_result['invalid_properties']
-                        tmp_df_invalid['invalid_values'] = validate_result['invalid_values']
-                        tmp_df_invalid['invalid_reason'] = validate_result['invalid_reason']
-                        tmp_df_invalid['invalid_line_num'] = line_num
-                        tmp_df_invalid['node_type'] = obj[NODE_TYPE]
-                        df_invalid = pd.concat([df_invalid,tmp_df_invalid])
-
-                except Exception as e:
-                    print(e)
-                try:
-                    if len(validate_result['missing_properties']) > 0:
-                        tmp_df_missing = pd.DataFrame()
-                        tmp_df_missing['missing_properties'] = validate_result['missing_properties']
-                        tmp_df_missing['missing_reason'] = validate_result['missing_reason']
-                        tmp_df_missing['missing_line_num'] = line_num
-                        tmp_df_missing['node_type'] = obj[NODE_TYPE]
-                        df_missing = pd.concat([df_missing, tmp_df_missing])
-                except Exception as e:
-                    print(e)
+                invalid_count = len(validate_result['invalid_properties'])
+                if invalid_count > 0:
+                    invalid['invalid_properties'].extend(validate_result['invalid_properties'])
+                    invalid['invalid_values'].extend(validate_result['invalid_values'])
+                    invalid['invalid_reason'].extend(validate_result['invalid_reason'])
+                    invalid['invalid_line_num'].extend([line_num] * invalid_count)
+                    invalid['node_type'].extend([obj[NODE_TYPE]] * invalid_count)
+                missing_count = len(validate_result['missing_properties'])
+                if missing_count > 0:
+                    missing['missing_properties'].extend(validate_result['missing_properties'])
+                    missing['missing_reason'].extend(validate_result['missing_reason'])
+                    missing['missing_line_num'].extend([line_num] * missing_count)
+                    missing['node_type'].extend([obj[NODE_TYPE]] * missing_count)
                 if not validate_result['result'] and not validate_result['warning']:
                     for msg in validate_result['messages']:
                         self.log.error('Invalid data at line {}: "{}"!'.format(line_num, msg))
@@ -653,6 +840,8 @@ class DataLoader:
                     for msg in validate_result['messages']:
                         self.log.warning('Invalid data at line {}: "{}"!'.format(line_num, msg))
             # ouput the data vlidation result
+            df_invalid = pd.DataFrame(invalid)
+            df_missing = pd.DataFrame(missing)
             df_duplicate_id['duplicate_id'] = duplicate_id
             df_duplicate_id['duplicate_reason'] = duplicate_reason
             df_duplicate_id['duplicate_line_num'] = duplicate_line_num
@@ -726,44 +915,38 @@ class DataLoader:
         else:
             return line_num_list
 
-    def get_new_statement(self, node_type, obj):
-        # statement is used to create current node
-        prop_stmts = []
-
-        for key in obj.keys():
-            if key in excluded_fields:
-                continue
-            elif is_parent_pointer(key):
-                continue
-            elif self.schema.is_relationship_property(key):
-                continue
-
-            prop_stmts.append('{0}: ${0}'.format(key))
-
-        statement = 'CREATE (:{0} {{ {1} }})'.format(node_type, ' ,'.join(prop_stmts))
-        return statement
-
-    def get_upsert_statement(self, node_type, id_field, obj):
-        # statement is used to create current node
-        statement = ''
-        prop_stmts = []
-
-        for key in obj.keys():
-            if key in excluded_fields:
-                continue
-            elif key == id_field:
-                continue
-            elif is_parent_pointer(key):
-                continue
-            elif self.schema.is_relationship_property(key):
-                continue
+    def get_node_row(self, obj):
+        """
+        Generate a row for batch statements, only contains properties that will be saved on the node
+        :param obj: input data object (dict), may contain parent pointers, relationship properties etc.
+        :return: an object (dict) that only contains properties to be saved on this node
+        """
+        return {key: value for key, value in self.get_node_properties(obj).items() if key not in excluded_fields}
 
-            prop_stmts.append('n.{0} = ${0}'.format(key))
+    # Batch statements only depend on labels and property names, so they are built once and cached
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_new_statement(node_type, id_field):
+        # statement is used to create a batch of nodes, one node for each row
+        parts = [
+            'UNWIND $rows AS row',
+            'CREATE (n:{0}) SET n = row'.format(node_type),
+            'RETURN row.{} AS node_id, id(n) AS internal_id'.format(id_field)
+        ]
+        return ' '.join(parts)
 
-        statement += 'MERGE (n:{0} {{ {1}: ${1} }})'.format(node_type, id_field)
-        statement += ' ON CREATE ' + 'SET n.{} = datetime(), '.format(CREATED) + ' ,'.join(prop_stmts)
-        statement += ' ON MATCH ' + 'SET n.{} = datetime(), '.format(UPDATED) + ' ,'.join(prop_stmts)
-        return statement
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_upsert_statement(node_type, id_field):
+        # statement is used to create or update a batch of nodes, one node for each row
+        parts = [
+            'UNWIND $rows AS row',
+            'MERGE (n:{0} {{ {1}: row.{1} }})'.format(node_type, id_field),
+            'ON CREATE SET n.{} = datetime(), n += row'.format(CREATED),
+            'ON MATCH SET n.{} = datetime(), n += row'.format(UPDATED),
+            'RETURN row.{} AS node_id, id(n) AS internal_id'.format(id_field)
+        ]
+        return ' '.join(parts)
 
     # Delete a node and children with no other parents recursively
     def delete_node(self, session, node):
@@ -781,9 +964,10 @@ class DataLoader:
     # Return children of node without other parents
     def get_children_with_single_parent(self, session, node):
         node_type = node[NODE_TYPE]
-        statement = 'MATCH (n:{0} {{ {1}: ${1} }})<--(m)'.format(node_type, self.schema.get_id_field(node))
+        id_field = self.schema.get_id_field(node)
+        statement = 'MATCH (n:{0} {{ {1}: $node_id }})<--(m)'.format(node_type, id_field)
         statement += ' WHERE NOT (n)<--(m)-->() RETURN m'
-        result = session.run(statement, node)
+        result = session.run(statement, {'node_id': self.schema.get_id(node, id_field)})
         children = []
         for obj in result:
             children.append(self.get_node_from_result(obj, 'm'))
@@ -801,13 +985,16 @@ class DataLoader:
     # Simple delete given node, and it's relationships
     def delete_single_node(self, session, node):
         node_type = node[NODE_TYPE]
-        statement = 'MATCH (n:{0} {{ {1}: ${1} }}) detach delete n'.format(node_type, self.schema.get_id_field(node))
-        result = session.run(statement, node)
-        nodes_deleted = result.consume().counters.nodes_deleted
-        self.nodes_deleted += nodes_deleted
-        self.nodes_deleted_stat[node_type] = self.nodes_deleted_stat.get(node_type, 0) + nodes_deleted
-        relationship_deleted = result.consume().counters.relationships_deleted
-        self.relationships_deleted += relationship_deleted
+        id_field = self.schema.get_id_field(node)
+        statement = 'MATCH (n:{0} {{ {1}: $node_id }}) detach delete n'.format(node_type, id_field)
+        result = session.run(statement, {'node_id': self.schema.get_id(node, id_field)})
+        counters = result.consume().counters
+        nodes_deleted = counters.nodes_deleted
+        relationship_deleted = counters.relationships_deleted
+        with self.stats_lock:
+            self.nodes_deleted += nodes_deleted
+            self.nodes_deleted_stat[node_type] = self.nodes_deleted_stat.get(node_type, 0) + nodes_deleted
+            self.relationships_deleted += relationship_deleted
         return nodes_deleted, relationship_deleted
 
     # load file
@@ -822,70 +1009,75 @@ class DataLoader:
             raise Exception('Wrong loading_mode: {}'.format(loading_mode))
         self.log.info('{} nodes from file: {}'.format(action_word, file_name))
 
-        file_encoding = check_encoding(file_name)
-        with open(file_name, encoding=file_encoding) as in_file:
-            reader = csv.DictReader(in_file, delimiter='\t')
+        with self.open_data_file(file_name) as in_file:
             nodes_created = 0
             nodes_updated = 0
             nodes_deleted = 0
             node_type = 'UNKNOWN'
             relationship_deleted = 0
-            line_num = 1
             transaction_counter = 0
+            # Rows waiting to be sent to Neo4j, grouped by (node_type, id_field)
+            batches = {}
+            # Ids of nodes created from current file and their line numbers, used to detect duplicates in "new" mode
+            new_ids = {}
 
             # Use session in one transaction mode
             tx = session
-            # Use transactions in split-transactions mode
-            if split:
+            # Use transactions in split-transactions mode, nodes are loaded with managed transactions instead
+            if split and loading_mode == DELETE_MODE:
                 tx = session.begin_transaction()
 
-            for org_obj in reader:
-                line_num += 1
+            for line_num, org_obj in self.read_data_file(in_file):
                 transaction_counter += 1
-                obj = self.prepare_node(org_obj)
+                if not org_obj.get(NODE_TYPE):
+                    raise Exception('Line: {}: No "{}" found, abort loading!'.format(line_num, NODE_TYPE))
+                obj = self.prepare_node(org_obj, True)
                 node_type = obj[NODE_TYPE]
-                node_id = self.schema.get_id(obj)
+                id_field = self.schema.get_id_field(obj)
+                node_id = self.schema.get_id(obj, id_field)
                 if not node_id:
                     raise Exception('Line:{}: No ids found!'.format(line_num))
-                id_field = self.schema.get_id_field(obj)
-                if loading_mode == UPSERT_MODE:
-                    statement = self.get_upsert_statement(node_type, id_field, obj)
-                elif loading_mode == NEW_MODE:
-                    if self.node_exists(tx, node_type, id_field, node_id):
-                        raise Exception(
-                            'Line: {}: Node (:{} {{ {}: {} }}) exists! Abort loading!'.format(line_num, node_type,
-                                                                                              id_field, node_id))
-                    else:
-                        statement = self.get_new_statement(node_type, obj)
-                elif loading_mode == DELETE_MODE:
+                if loading_mode == DELETE_MODE:
                     n_deleted, r_deleted = self.delete_node(tx, obj)
                     nodes_deleted += n_deleted
                     relationship_deleted += r_deleted
                 else:
-                    raise Exception('Wrong loading_mode: {}'.format(loading_mode))
-
-                if loading_mode != DELETE_MODE:
-                    result = tx.run(statement, obj)
-                    count = result.consume().counters.nodes_created
-                    #count the updated nodes
-                    update_count = 0
-                    if result.consume().counters.nodes_created == 0 and result.consume().counters._contains_updates:
-                        update_count = 1
-                    self.nodes_created += count
-                    self.nodes_updated += update_count
-                    nodes_created += count
-                    nodes_updated += update_count
-                    self.nodes_stat[node_type] = self.nodes_stat.get(node_type, 0) + count
-                    self.nodes_stat_updated[node_type] = self.nodes_stat_updated.get(node_type, 0) + update_count
+                    if loading_mode == NEW_MODE:
+                        # Nodes already in DB are checked for the whole batch right before it's sent
+                        if (node_type, node_id) in new_ids:
+                            raise Exception(
+                                'Line: {}: Node (:{} {{ {}: {} }}) exists! Abort loading!'.format(line_num, node_type,
+                                                                                                  id_field, node_id))
+                        new_ids[(node_type, node_id)] = line_num
+                    rows = batches.setdefault((node_type, id_field), [])
+                    rows.append(self.get_node_row(obj))
+                    # In split-transactions mode, rows are sent when a transaction is full
+                    if not split and len(rows) >= UNWIND_BATCH_SIZE:
+                        created, updated = self.save_node_batches(tx, loading_mode, batches, new_ids)
+                        nodes_created += created
+                        nodes_updated += updated
+
                 # commit and restart a transaction when batch size reached
-                if split and transaction_counter >= BATCH_SIZE:
+                if split and loading_mode == DELETE_MODE and transaction_counter >= BATCH_SIZE:
                     tx.commit()
                     tx = session.begin_transaction()
                     self.log.info(f'{line_num - 1} rows loaded ...')
                     transaction_counter = 0
-            # commit last transaction
-            if split:
-                tx.commit()
+                elif split and transaction_counter >= TRANSACTION_SIZE:
+                    created, updated = self.save_node_batches(tx, loading_mode, batches, new_ids, split)
+                    nodes_created += created
+                    nodes_updated += updated
+                    self.log.info(f'{line_num - 1} rows loaded ...')
+                    transaction_counter = 0
+            if loading_mode == DELETE_MODE:
+                # commit last transaction
+                if split:
+                    tx.commit()
+            else:
+                # send remaining rows
+                created, updated = self.save_node_batches(tx, loading_mode, batches, new_ids, split)
+                nodes_created += created
+                nodes_updated += updated
 
             if loading_mode == DELETE_MODE:
                 self.log.info('{} node(s) deleted'.format(nodes_deleted))
@@ -894,10 +1086,107 @@ class DataLoader:
                 self.log.info('{} (:{}) node(s) loaded'.format(nodes_created, node_type))
                 self.log.info('{} (:{}) node(s) updated'.format(nodes_updated, node_type))
 
+    def save_node_batches(self, session, loading_mode, batches, new_ids=None, split=False):
+        """
+        Send all pending batches to Neo4j and update statistics, batches will be emptied afterwards
+        In split-transactions mode, batches are sent in a managed transaction, which is retried by the driver on
+        transient errors like deadlocks, statistics are only updated after the transaction is committed
+        :param session: the current neo4j session, or transaction if not in split-transactions mode
+        :param loading_mode: loading mode, "upsert" or "new"
+        :param batches: dict of lists of rows, keyed by (node_type, id_field)
+        :param new_ids: dict of line numbers keyed by (node_type, node_id), only used in "new" mode
+        :param split: split-transactions mode
+        :return: tuple of numbers of nodes created and updated
+        """
+        if not batches:
+            return 0, 0
+        if split:
+            results = session.write_transaction(self.load_node_batches, loading_mode, batches, new_ids)
+        else:
+            results = self.load_node_batches(session, loading_mode, batches, new_ids)
+        batches.clear()
+        nodes_created = 0
+        nodes_updated = 0
+        with self.stats_lock:
+            for node_type, count, update_count, node_ids in results:
+                # Remember internal ids, so relationships to these nodes can be matched by id
+                for node_id, internal_id in node_ids:
+                    self.node_ids[(node_type, node_id)] = internal_id
+                nodes_created += count
+                nodes_updated += update_count
+                self.nodes_created += count
+                self.nodes_updated += update_count
+                self.nodes_stat[node_type] = self.nodes_stat.get(node_type, 0) + count
+                self.nodes_stat_updated[node_type] = self.nodes_stat_updated.get(node_type, 0) + update_count
+        return nodes_created, nodes_updated
+
+    def load_node_batches(self, session, loading_mode, batches, new_ids=None):
+        """
+        Send all pending batches to Neo4j, at most UNWIND_BATCH_SIZE rows in each statement
+        :param session: the current neo4j session or transaction
+        :param loading_mode: loading mode, "upsert" or "new"
+        :param batches: dict of lists of rows, keyed by (node_type, id_field)
+        :param new_ids: dict of line numbers keyed by (node_type, node_id), only used in "new" mode
+        :return: list of tuples of node type, numbers of nodes created and updated, and (node_id, internal id) pairs
+        """
+        results = []
+        for (node_type, id_field), rows in batches.items():
+            for start in range(0, len(rows), UNWIND_BATCH_SIZE):
+                created, updated, node_ids = self.load_node_batch(session, loading_mode, node_type, id_field,
+                                                                  rows[start:start + UNWIND_BATCH_SIZE], new_ids)
+                results.append((node_type, created, updated, node_ids))
+        return results
+
+    def load_node_batch(self, session, loading_mode, node_type, id_field, rows, new_ids=None):
+        """
+        Create or update a batch of nodes of the same type with one UNWIND statement
+        :param session: the current neo4j session or transaction
+        :param loading_mode: loading mode, "upsert" or "new"
+        :param node_type: type (label) of the nodes
+        :param id_field: id field of the nodes
+        :param rows: list of node properties (dict)
+        :param new_ids: dict of line numbers keyed by (node_type, node_id), only used in "new" mode
+        :return: tuple of numbers of nodes created and updated, and list of (node_id, internal id) pairs
+        """
+        if not rows:
+            return 0, 0, []
+        if loading_mode == UPSERT_MODE:
+            statement = self.get_upsert_statement(node_type, id_field)
+        elif loading_mode == NEW_MODE:
+            existing_ids = self.get_existing_ids(session, node_type, id_field, [row[id_field] for row in rows])
+            if existing_ids:
+                # Report the first line in file that has an existing node
+                line_nums = new_ids or {}
+                line_num, node_id = min((line_nums.get((node_type, node_id), 0), node_id) for node_id in existing_ids)
+                raise Exception('Line: {}: Node (:{} {{ {}: {} }}) exists! Abort loading!'.format(line_num, node_type,
+                                                                                                  id_field, node_id))
+            statement = self.get_new_statement(node_type, id_field)
+        else:
+            raise Exception('Wrong loading_mode: {}'.format(loading_mode))
+        result = session.run(statement, {'rows': rows})
+        node_ids = [(record['node_id'], record['internal_id']) for record in result]
+        count = result.consume().counters.nodes_created
+        # Every row that didn't create a node matched (and updated) an existing one
+        update_count = len(rows) - count if loading_mode == UPSERT_MODE else 0
+        return count, update_count, node_ids
+
+    @staticmethod
+    def get_existing_ids(session, label, prop, values):
+        """
+        Find out which of given ids already exist in DB, using one query for all ids
+        :param session: the current neo4j session or transaction
+        :param label: type (label) of the nodes
+        :param prop: id field of the nodes
+        :param values: list of ids to check
+        :return: set of ids that already exist in DB
+        """
+        statement = 'UNWIND $values AS value MATCH (m:{0} {{ {1}: value }}) RETURN DISTINCT value'.format(label, prop)
+        result = session.run(statement, {'values': values})
+        return {record['value'] for record in result}
 
     def node_exists(self, session, label, prop, value):
-        statement = 'MATCH (m:{0} {{ {1}: ${1} }}) return m'.format(label, prop)
-        result = session.run(statement, {prop: value})
+        statement = 'MATCH (m:{0} {{ {1}: $value }}) return m'.format(label, prop)
+        result = session.run(statement, {'value': value})
         count = len(result.data())
         if count > 1:
             self.log.warning('More than one nodes found! ')
@@ -911,9 +1200,9 @@ class DataLoader:
         relationship_properties = {}
         #print(obj.items())
         for key, value in obj.items():
-            if is_parent_pointer(key):
+            column_type, other_node, other_id = self.get_column_info(key)
+            if column_type == PARENT_POINTER:
                 provided_parents += 1
-                other_node, other_id = key.split('.')
                 relationship = self.schema.get_relationship(node_type, other_node)
                 if not isinstance(relationship, dict):
                     self.log.error('Line: {}: Relationship not found!'.format(line_num))
@@ -923,13 +1212,17 @@ class DataLoader:
                 if not relationship_name:
                     self.log.error('Line: {}: Relationship not found!'.format(line_num))
                     raise Exception('Undefined relationship, abort loading!')
-                if not self.node_exists(session, other_node, other_id, value):
+                # When loading, missing parents are detected by the batched relationship statement, so parents
+                # only need to be checked here if a plugin may create them
+                check_parent = not create_intermediate_node or self.creates_missing_parent(other_node)
+                if check_parent and not self.node_exists(session, other_node, other_id, value):
                     create_parent = False
                     if create_intermediate_node:
                         for plugin in self.plugins:
                             if plugin.should_run(other_node, MISSING_PARENT):
                                 create_parent = True
-                                if plugin.create_node(session, line_num, other_node, value, obj):
+                                parent_created = plugin.create_node(session, line_num, other_node, value, obj)
+                                if parent_created:
                                     int_node_created += 1
                                     relationships.append(
                                         {PARENT_TYPE: other_node, PARENT_ID_FIELD: other_id, PARENT_ID: value,
@@ -957,45 +1250,47 @@ class DataLoader:
                     else:
                         relationships.append({PARENT_TYPE: other_node, PARENT_ID_FIELD: other_id, PARENT_ID: value,
                                               RELATIONSHIP_TYPE: relationship_name, MULTIPLIER: multiplier})
-            elif self.schema.is_relationship_property(key):
-                rel_name, prop_name = key.split(self.rel_prop_delimiter)
+            elif column_type == RELATIONSHIP_PROPERTY:
+                rel_name, prop_name = other_node, other_id
                 if rel_name not in relationship_properties:
                     relationship_properties[rel_name] = {}
                 relationship_properties[rel_name][prop_name] = value
         return {RELATIONSHIPS: relationships, INT_NODE_CREATED: int_node_created, PROVIDED_PARENTS: provided_parents,
                 RELATIONSHIP_PROPS: relationship_properties}
 
-    def parent_already_has_child(self, session, node_type, node, relationship_name, parent_type, parent_id_field,
-                                 parent_id):
-        statement = 'MATCH (n:{})-[r:{}]->(m:{} {{ {}: $parent_id }}) return n'.format(node_type, relationship_name,
-                                                                                       parent_type, parent_id_field)
-        result = session.run(statement, {"parent_id": parent_id})
-        if result:
-            child = result.single()
-            if child:
-                find_current_node_statement = 'MATCH (n:{0} {{ {1}: ${1} }}) return n'.format(node_type,
-                                                                                              self.schema.get_id_field(
-                                                                                                  node))
-                current_node_result = session.run(find_current_node_statement, node)
-                if current_node_result:
-                    current_node = current_node_result.single()
-                    return child[0].id != current_node[0].id
-                else:
-                    self.log.error('Could NOT find current node!')
+    def has_parent_pointers(self, row):
+        for key in row.keys():
+            if self.get_column_info(key)[0] == PARENT_POINTER:
+                return True
+        return False
 
+    def creates_missing_parent(self, node_type):
+        for plugin in self.plugins:
+            if plugin.should_run(node_type, MISSING_PARENT):
+                return True
         return False
 
+    def parent_already_has_child(self, session, node_type, node, relationship_name, parent_type, parent_id_field,
+                                 parent_id):
+        # Look for children other than current node in one query
+        statement = 'MATCH (n:{})-[r:{}]->(m:{} {{ {}: $parent_id }})'.format(node_type, relationship_name,
+                                                                             parent_type, parent_id_field)
+        id_field = self.schema.get_id_field(node)
+        statement += ' WHERE n.{} <> $node_id RETURN n LIMIT 1'.format(id_field)
+        result = session.run(statement, {'parent_id': parent_id, 'node_id': self.schema.get_id(node, id_field)})
+        return result.single() is not None
+
     # Check if a relationship of same type exists, if so, return a statement which can delete it, otherwise return False
     def has_existing_relationship(self, session, node_type, node, relationship, count_same_parent=False):
         relationship_name = relationship[RELATIONSHIP_TYPE]
         parent_type = relationship[PARENT_TYPE]
         parent_id_field = relationship[PARENT_ID_FIELD]
 
-        base_statement = 'MATCH (n:{0} {{ {1}: ${1} }})-[r:{2}]->(m:{3})'.format(node_type,
-                                                                                 self.schema.get_id_field(node),
-                                                                                 relationship_name, parent_type)
+        id_field = self.schema.get_id_field(node)
+        base_statement = 'MATCH (n:{0} {{ {1}: $node_id }})-[r:{2}]->(m:{3})'.format(node_type, id_field,
+                                                                                    relationship_name, parent_type)
         statement = base_statement + ' return m.{} AS {}'.format(parent_id_field, PARENT_ID)
-        result = session.run(statement, node)
+        result = session.run(statement, {'node_id': self.schema.get_id(node, id_field)})
         if result:
             old_parent = result.single()
             if old_parent:
@@ -1014,13 +1309,6 @@ class DataLoader:
 
         return False
 
-    def remove_old_relationship(self, session, node_type, node, relationship):
-        del_statement = self.has_existing_relationship(session, node_type, node, relationship)
-        if del_statement:
-            del_result = session.run(del_statement, node)
-            if not del_result:
-                self.log.error('Delete old relationship failed!')
-
     def load_relationships(self, session, file_name, loading_mode, split=False):
         if loading_mode == NEW_MODE:
             action_word = 'Loading new'
@@ -1030,24 +1318,43 @@ class DataLoader:
             raise Exception('Wrong loading_mode: {}'.format(loading_mode))
         self.log.info('{} relationships from file: {}'.format(action_word, file_name))
 
-        file_encoding = check_encoding(file_name)
-        with open(file_name, encoding=file_encoding) as in_file:
-            reader = csv.DictReader(in_file, delimiter='\t')
+        with self.open_data_file(file_name) as in_file:
+            rows = self.read_data_file(in_file)
+            first_row = next(rows, None)
+            if first_row is None:
+                return True
+            # Files without any parent pointer columns can't have relationships, no need to read the rows
+            if not self.has_parent_pointers(first_row[1]):
+                self.log.warning('there is no parent mapping columns in the node {}'.format(
+                    first_row[1].get(NODE_TYPE)))
+                return True
             relationships_created = {}
             int_nodes_created = 0
-            line_num = 1
             transaction_counter = 0
+            # Relationships waiting to be sent to Neo4j, grouped by node types, relationship type and id fields
+            batches = {}
+            batched_relationships = 0
+            # Lines that provided parents but haven't been loaded yet
+            pending_lines = set()
+            # Rows waiting for NODE_LOADED plugins, which need to run after relationships are loaded
+            pending_plugin_rows = []
+            # Relationships created from current file, used to detect duplicates in "new" mode
+            new_relationships = set()
+            # Children in current batches that will have relationships to old parents removed, a child can only have
+            # one parent of each type, so a second relationship for same child needs to wait for next batches
+            batched_children = set()
 
             # Use session in one transaction mode
             tx = session
             # Use transactions in split-transactions mode
             if split:
                 tx = session.begin_transaction()
-            for org_obj in reader:
-                line_num += 1
+            for line_num, org_obj in chain([first_row], rows):
                 transaction_counter += 1
-                obj = self.prepare_node(org_obj)
+                obj = self.prepare_node(org_obj, True)
                 node_type = obj[NODE_TYPE]
+                id_field = self.schema.get_id_field(obj)
+                node_id = self.schema.get_id(obj, id_field)
                 results = self.collect_relationships(obj, tx, True, line_num)
                 relationships = results[RELATIONSHIPS]
                 int_nodes_created += results[INT_NODE_CREATED]
@@ -1056,6 +1363,21 @@ class DataLoader:
                 if provided_parents > 0:
                     if len(relationships) == 0:
                         raise Exception('Line: {}: No parents found, abort loading!'.format(line_num))
+                    # Old relationships of all rows in a batch are removed before any new ones are created, if same
+                    # child is already in current batches, send them first, so the last parent in file is kept
+                    if loading_mode == UPSERT_MODE and batched_children:
+                        for relationship in relationships:
+                            if (relationship[MULTIPLIER] in [DEFAULT_MULTIPLIER, ONE_TO_ONE] and
+                                    (node_type, node_id, relationship[RELATIONSHIP_TYPE],
+                                     relationship[PARENT_TYPE]) in batched_children):
+                                int_nodes_created += self.load_relationship_batches(tx, batches, pending_lines,
+                                                                                    pending_plugin_rows,
+                                                                                    relationships_created)
+                                batched_relationships = 0
+                                batched_children.clear()
+                                break
+                    pending_lines.add(line_num)
+                    send_now = False
                     for relationship in relationships:
                         relationship_name = relationship[RELATIONSHIP_TYPE]
                         multiplier = relationship[MULTIPLIER]
@@ -1063,46 +1385,64 @@ class DataLoader:
                         parent_id_field = relationship[PARENT_ID_FIELD]
                         parent_id = relationship[PARENT_ID]
                         properties = relationship_props.get(relationship_name, {})
+                        remove_old = False
                         if multiplier in [DEFAULT_MULTIPLIER, ONE_TO_ONE]:
                             if loading_mode == UPSERT_MODE:
-                                self.remove_old_relationship(tx, node_type, obj, relationship)
+                                # Relationships to old parents will be removed by the batch statement
+                                remove_old = True
+                                batched_children.add((node_type, node_id, relationship_name, parent_node))
                             elif loading_mode == NEW_MODE:
-                                if self.has_existing_relationship(tx, node_type, obj, relationship, True):
+                                relationship_key = (node_type, node_id, relationship_name, parent_node)
+                                if (relationship_key in new_relationships or
+                                        self.has_existing_relationship(tx, node_type, obj, relationship, True)):
                                     raise Exception(
                                         'Line: {}: Relationship already exists, abort loading!'.format(line_num))
+                                new_relationships.add(relationship_key)
                             else:
                                 raise Exception('Wrong loading_mode: {}'.format(loading_mode))
-                        else:
+                        elif self.debug_enabled:
                             self.log.debug('Multiplier: {}, no action needed!'.format(multiplier))
-                        prop_statement = ', '.join(self.get_relationship_prop_statements(properties))
-                        statement = 'MATCH (m:{0} {{ {1}: $__parentID__ }})'.format(parent_node, parent_id_field)
-                        statement += ' MATCH (n:{0} {{ {1}: ${1} }})'.format(node_type,
-                                                                             self.schema.get_id_field(obj))
-                        statement += ' MERGE (n)-[r:{}]->(m)'.format(relationship_name)
-                        statement += ' ON CREATE SET r.{} = datetime()'.format(CREATED)
-                        statement += ', {}'.format(prop_statement) if prop_statement else ''
-                        statement += ' ON MATCH SET r.{} = datetime()'.format(UPDATED)
-                        statement += ', {}'.format(prop_statement) if prop_statement else ''
-
-                        result = tx.run(statement, {**obj, "__parentID__": parent_id, **properties})
-                        count = result.consume().counters.relationships_created
-                        self.relationships_created += count
-                        relationship_pattern = '(:{})->[:{}]->(:{})'.format(node_type, relationship_name, parent_node)
-                        relationships_created[relationship_pattern] = relationships_created.get(relationship_pattern,
-                                                                                                0) + count
-                        self.relationships_stat[relationship_name] = self.relationships_stat.get(relationship_name,
-                                                                                                 0) + count
+                        # One_to_one relationships are sent right away, so following rows can be checked against them
+                        if multiplier == ONE_TO_ONE:
+                            send_now = True
+                        row = {'line': line_num, 'node_id': node_id, 'parent_id': parent_id, 'properties': properties}
+                        # Match nodes by internal ids if both of them have been loaded by current load, internal ids
+                        # are kept by id fields, so parents pointed to by other properties are still matched by them
+                        by_id = False
+                        if parent_id_field == self.schema.get_id_field({NODE_TYPE: parent_node}):
+                            node_internal_id = self.node_ids.get((node_type, node_id))
+                            parent_internal_id = self.node_ids.get((parent_node, parent_id))
+                            by_id = node_internal_id is not None and parent_internal_id is not None
+                        if by_id:
+                            row['node_internal_id'] = node_internal_id
+                            row['parent_internal_id'] = parent_internal_id
+                        batch_key = (node_type, id_field, relationship_name, parent_node, parent_id_field, remove_old,
+                                     by_id)
+                        batches.setdefault(batch_key, []).append(row)
+                        batched_relationships += 1
                     for plugin in self.plugins:
                         if plugin.should_run(node_type, NODE_LOADED):
-                            if plugin.create_node(session=tx, line_num=line_num, src=obj):
-                                int_nodes_created += 1
+                            pending_plugin_rows.append((line_num, obj))
+                            break
+                    if send_now or batched_relationships >= UNWIND_BATCH_SIZE:
+                        int_nodes_created += self.load_relationship_batches(tx, batches, pending_lines,
+                                                                            pending_plugin_rows, relationships_created)
+                        batched_relationships = 0
+                        batched_children.clear()
                 # commit and restart a transaction when batch size reached
                 if split and transaction_counter >= BATCH_SIZE:
+                    int_nodes_created += self.load_relationship_batches(tx, batches, pending_lines,
+                                                                        pending_plugin_rows, relationships_created)
+                    batched_relationships = 0
+                    batched_children.clear()
                     tx.commit()
                     tx = session.begin_transaction()
                     self.log.info(f'{line_num - 1} rows loaded ...')
                     transaction_counter = 0
 
+            # send remaining relationships
+            int_nodes_created += self.load_relationship_batches(tx, batches, pending_lines, pending_plugin_rows,
+                                                                relationships_created)
             # commit last transaction
             if split:
                 tx.commit()
@@ -1115,13 +1455,90 @@ class DataLoader:
 
         return True
 
-    @staticmethod
-    def get_relationship_prop_statements(props):
-        prop_stmts = []
+    def load_relationship_batches(self, session, batches, pending_lines, pending_plugin_rows, relationships_created):
+        """
+        Send all pending relationship batches to Neo4j, then run NODE_LOADED plugins on loaded rows
+        :param session: the current neo4j session or transaction
+        :param batches: dict of lists of relationship rows, keyed by batch key, will be emptied afterwards
+        :param pending_lines: set of line numbers that provided parents, will be emptied afterwards
+        :param pending_plugin_rows: list of (line_num, obj) for NODE_LOADED plugins, will be emptied afterwards
+        :param relationships_created: dict of relationship counts in current file, keyed by relationship pattern
+        :return: number of intermediate nodes created by plugins
+        """
+        loaded_lines = set()
+        for batch_key, rows in batches.items():
+            loaded_lines.update(self.load_relationship_batch(session, batch_key, rows, relationships_created))
+        batches.clear()
+        missing_lines = pending_lines - loaded_lines
+        if missing_lines:
+            raise Exception('Line: {}: No parents found, abort loading!'.format(min(missing_lines)))
+        pending_lines.clear()
+
+        int_nodes_created = 0
+        for line_num, obj in pending_plugin_rows:
+            for plugin in self.plugins:
+                if plugin.should_run(obj[NODE_TYPE], NODE_LOADED):
+                    node_created = plugin.create_node(session=session, line_num=line_num, src=obj)
+                    if node_created:
+                        int_nodes_created += 1
+        pending_plugin_rows.clear()
+        return int_nodes_created
+
+    def load_relationship_batch(self, session, batch_key, rows, relationships_created):
+        """
+        Create or update a batch of relationships with one UNWIND statement
+        :param session: the current neo4j session or transaction
+        :param batch_key: tuple of (node_type, id_field, relationship_name, parent_node, parent_id_field, remove_old,
+                          by_id)
+        :param rows: list of relationship rows (dict) with line number, node id, parent id and properties
+        :param relationships_created: dict of relationship counts in current file, keyed by relationship pattern
+        :return: set of line numbers that got their relationship loaded
+        """
+        node_type, id_field, relationship_name, parent_node, parent_id_field, remove_old, by_id = batch_key
+        statement = self.get_relationship_statement(node_type, id_field, relationship_name, parent_node,
+                                                    parent_id_field, remove_old, by_id)
+        result = session.run(statement, {'rows': rows})
+        loaded_lines = {record['line'] for record in result}
+        counters = result.consume().counters
+        # Rows with missing parents won't match, so they don't create any relationships
+        for row in rows:
+            if row['line'] not in loaded_lines:
+                self.log.warning('Line: {}: Parent node (:{} {{{}: "{}"}} not found in DB!'.format(
+                    row['line'], parent_node, parent_id_field, row['parent_id']))
+        if remove_old and counters.relationships_deleted > 0:
+            self.log.warning('Old parent is different from new parent, {} relationship(s) to old (:{}) parent deleted!'
+                             .format(counters.relationships_deleted, parent_node))
+        count = counters.relationships_created
+        relationship_pattern = '(:{})->[:{}]->(:{})'.format(node_type, relationship_name, parent_node)
+        relationships_created[relationship_pattern] = relationships_created.get(relationship_pattern, 0) + count
+        with self.stats_lock:
+            self.relationships_created += count
+            self.relationships_stat[relationship_name] = self.relationships_stat.get(relationship_name, 0) + count
+        return loaded_lines
 
-        for key in props:
-            prop_stmts.append('r.{0} = ${0}'.format(key))
-        return prop_stmts
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_relationship_statement(node_type, id_field, relationship_name, parent_node, parent_id_field,
+                                   remove_old=False, by_id=False):
+        # Only labels and property names are put into the statement, all values are passed in as parameters
+        parts = ['UNWIND $rows AS row']
+        if by_id:
+            # Both nodes were loaded by current load, match them by internal ids instead of looking up id properties
+            parts.append('MATCH (m) WHERE id(m) = row.parent_internal_id')
+            parts.append('MATCH (n) WHERE id(n) = row.node_internal_id')
+        else:
+            parts.append('MATCH (m:{0} {{ {1}: row.parent_id }})'.format(parent_node, parent_id_field))
+            parts.append('MATCH (n:{0} {{ {1}: row.node_id }})'.format(node_type, id_field))
+        if remove_old:
+            # Only one parent of this type is allowed, remove relationships to any other parents
+            parts.append('OPTIONAL MATCH (n)-[old:{}]->(o:{}) WHERE o <> m'.format(relationship_name, parent_node))
+            parts.append('WITH row, m, n, collect(old) AS old_relationships')
+            parts.append('FOREACH (old IN old_relationships | DELETE old)')
+        parts.append('MERGE (n)-[r:{}]->(m)'.format(relationship_name))
+        parts.append('ON CREATE SET r.{} = datetime(), r += row.properties'.format(CREATED))
+        parts.append('ON MATCH SET r.{} = datetime(), r += row.properties'.format(UPDATED))
+        parts.append('RETURN row.line AS line')
+        return ' '.join(parts)
 
     def wipe_db(self, session, split=False):
         if split:
@@ -1138,8 +1555,8 @@ class DataLoader:
         while True:
             tx = session.begin_transaction()
             try:
-                cleanup_db = f'MATCH (n) WITH n LIMIT {BATCH_SIZE} DETACH DELETE n'
-                result = tx.run(cleanup_db).consume()
+                cleanup_db = 'MATCH (n) WITH n LIMIT $limit DETACH DELETE n'
+                result = tx.run(cleanup_db, {'limit': BATCH_SIZE}).consume()
                 tx.commit()
                 deleted_nodes = result.counters.nodes_deleted
                 self.nodes_deleted += deleted_nodes
@@ -1158,15 +1575,15 @@ class DataLoader:
 
     def create_indexes(self, session):
         """
-        Creates indexes, if they do not already exist, for all entries in the "id_fields" and "indexes" sections of the
-        properties file
-        :param session: the current neo4j transaction session
+        Creates uniqueness constraints for all entries in the "id_fields" section, and indexes for all entries in the
+        "indexes" section of the properties file, if they do not already exist
+        :param session: the current neo4j session, each index or constraint is created in its own transaction
         """
         existing = get_btree_indexes(session)
-        # Create indexes from "id_fields" section of the properties file
+        # Create uniqueness constraints from "id_fields" section of the properties file
         ids = self.schema.props.id_fields
         for node_name in ids:
-            self.create_index(node_name, ids[node_name], existing, session)
+            self.create_constraint(node_name, ids[node_name], existing, session)
         # Create indexes from "indexes" section of the properties file
         indexes = self.schema.props.indexes
         # each index is a dictionary, indexes is a list of these dictionaries
@@ -1183,5 +1600,30 @@ class DataLoader:
         if index_tuple not in existing:
             command = "CREATE INDEX ON :{}({});".format(node_name, node_property)
             session.run(command)
+            existing.add(index_tuple)
             self.indexes_created += 1
-            self.log.info("Index created for \"{}\" on property \"{}\"".format(node_name, node_property))
\ No newline at end of file
+            self.log.info("Index created for \"{}\" on property \"{}\"".format(node_name, node_property))
+
+    def create_constraint(self, node_name, node_property, existing, session):
+        """
+        Creates a uniqueness constraint on id field of a node, the constraint also creates an index on the id field.
+        If an index on the id field already exists, it will be used as is
+        Nodes created by plugins are not always merged on their id fields, so they only get an index, a plain index is
+        also created if the constraint can't be created, e.g. there are duplicate ids in DB
+        """
+        if isinstance(node_property, list) or self.creates_missing_parent(node_name):
+            return self.create_index(node_name, node_property, existing, session)
+        index_tuple = format_as_tuple(node_name, node_property)
+        if index_tuple not in existing:
+            command = "CREATE CONSTRAINT IF NOT EXISTS FOR (n:{0}) REQUIRE n.{1} IS UNIQUE".format(node_name,
+                                                                                               node_property)
+            try:
+                session.run(command).consume()
+            except Neo4jError as e:
+                self.log.warning('Could not create uniqueness constraint for "{}" on property "{}", create an index '
+                                 'instead: {}'.format(node_name, node_property, e.message))
+                return self.create_index(node_name, node_property, existing, session)
+            existing.add(index_tuple)
+            self.constraints_created += 1
+            self.log.info("Uniqueness constraint created for \"{}\" on property \"{}\"".format(node_name,
+                                                                                                 node_property))
\ No newline at end of file
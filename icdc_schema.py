@@ -1,3 +1,4 @@
+import logging
 import os
 import re
 import sys
@@ -35,6 +36,7 @@ MAX = 'maximum'
 EX_MIN = 'exclusiveMinimum'
 EX_MAX = 'exclusiveMaximum'
 DESCRIPTION = 'Desc'
+PARENT_POINTER_PATTERN = re.compile(r'\w+\.\w+')
 
 
 def get_list_values(list_str):
@@ -42,7 +44,8 @@ def get_list_values(list_str):
 
 
 def is_parent_pointer(field_name):
-    return re.fullmatch(r'\w+\.\w+', field_name) is not None
+    # Most columns don't contain a dot, so regular expression only runs on possible parent pointers
+    return '.' in field_name and PARENT_POINTER_PATTERN.fullmatch(field_name) is not None
 
 
 class ICDC_Schema:
@@ -51,6 +54,7 @@ class ICDC_Schema:
             raise AssertionError
         self.props = props
         self.rel_prop_delimiter = props.rel_prop_delimiter
+        self.rel_prop_pattern = re.compile(r'^.+\\{}.+$'.format(self.rel_prop_delimiter))
 
         if not yaml_files:
             raise Exception('File list is empty,could not initialize ICDC_Schema object!')
@@ -59,6 +63,8 @@ class ICDC_Schema:
                 if not os.path.isfile(data_file):
                     raise Exception('File "{}" does not exist'.format(data_file))
         self.log = get_logger('ICDC Schema')
+        # Checked once, so per row debug messages are not formatted unless debug logging is enabled
+        self.debug_enabled = self.log.isEnabledFor(logging.DEBUG)
         self.org_schema = {}
         for aFile in yaml_files:
             try:
@@ -405,7 +411,7 @@ class ICDC_Schema:
             elif is_parent_pointer(key):
                 continue
             elif self.is_relationship_property(key):
-                rel_type, rel_prop = key.split(self.rel_prop_delimiter)
+                rel_type, _, rel_prop = key.partition(self.rel_prop_delimiter)
                 if rel_type not in self.relationship_props:
                     result['result'] = False
                     result['messages'].append(f'Relationship "{rel_type}" does NOT exist in data model!')
@@ -434,7 +440,8 @@ class ICDC_Schema:
                             'Property: "{}":"{}" is not a valid "{}" type!'.format(rel_prop, value, prop_type))
 
             elif key not in properties:
-                self.log.debug('Property "{}" is not in data model!'.format(key))
+                if self.debug_enabled:
+                    self.log.debug('Property "{}" is not in data model!'.format(key))
             else:
                 prop_type = properties[key]
                 type_validation_result, error_type = self._validate_type(prop_type, value)
@@ -626,9 +633,10 @@ class ICDC_Schema:
             self.log.error('get_id_field: "{}" field is empty'.format(NODE_TYPE))
             return None
 
-    # Find node's id
-    def get_id(self, obj):
-        id_field = self.get_id_field(obj)
+    # Find node's id, id_field can be passed in if caller already has it
+    def get_id(self, obj, id_field=None):
+        if id_field is None:
+            id_field = self.get_id_field(obj)
         if not id_field:
             return None
         if id_field not in obj:
@@ -637,4 +645,4 @@ class ICDC_Schema:
             return obj[id_field]
 
     def is_relationship_property(self, key):
-        return re.match(r'^.+\\{}.+$'.format(self.rel_prop_delimiter), key)
+        return self.rel_prop_delimiter in key and self.rel_prop_pattern.match(key)
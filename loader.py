@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
 import argparse
-import glob
 import os
 import sys
 import zipfile
@@ -25,6 +24,7 @@ from bento.common.s3 import S3Bucket, upload_log_file
 
 DEFAULT_MAX_VIOLATIONS = 1000000
 DEFAULT_TEMP_FOLDER = "tmp"
+DEFAULT_WORKERS = 1
 
 
 def parse_arguments(args = None):
@@ -51,6 +51,8 @@ def parse_arguments(args = None):
     parser.add_argument('--dataset', help='Dataset directory')
     parser.add_argument('--split-transactions', help='Creates a separate transaction for each file',
                         action='store_true')
+    parser.add_argument('-w', '--workers', help='Number of files to load in parallel, requires split transactions mode',
+                        type=int)
     parser.add_argument('--upload-log-dir', help='Upload destination dir for log file,  if dir in s3, use the format, s3://[bucket]/[prefix]')
     return parser.parse_args(args)
 
@@ -116,7 +118,7 @@ def process_arguments(args, log):
         if not os.path.exists(config.dataset):
             os.makedirs(config.dataset)
         else:
-            exist_files = glob.glob('{}/*.txt'.format(config.dataset))
+            exist_files = list_data_files(config.dataset, ('.txt',))
             if len(exist_files) > 0:
                 log.error('Folder: "{}" is not empty, please empty it first'.format(config.dataset))
                 sys.exit(1)
@@ -173,12 +175,24 @@ def process_arguments(args, log):
     if args.upload_log_dir:
         config.upload_log_dir = args.upload_log_dir
 
+    if args.workers:
+        config.workers = args.workers
+    if not config.workers:
+        config.workers = DEFAULT_WORKERS
+    if config.workers > 1 and not config.split_transactions:
+        log.error('Loading files in parallel (--workers) requires split transactions mode (--split-transactions)')
+        sys.exit(1)
+
     # Only applies when running in Prefect via loader_prefect.py, which doesn't have config files and temp_foldetemp_folderr
     # So plugins have to be passed in from Prefect parameters
     # In that case args is an object that contains all Prefect parameters
     if hasattr(args, 'plugins'):
         config.plugins = args.plugins
 
+    if config.workers > 1 and config.plugins:
+        log.error('Loading files in parallel (--workers) is not supported when plugins are configured')
+        sys.exit(1)
+
     if hasattr(args, 'temp_folder'):
         config.temp_folder = args.temp_folder
 
@@ -210,9 +224,7 @@ def main(args):
     restore_cmd = ''
     load_result = None
     try:
-        txt_files = glob.glob('{}/*.txt'.format(config.dataset))
-        tsv_files = glob.glob('{}/*.tsv'.format(config.dataset))
-        file_list = txt_files + tsv_files
+        file_list = list_data_files(config.dataset)
         if file_list:
             if config.wipe_db and not config.yes:
                 if not confirm_deletion('Wipe out entire Neo4j database before loading?'):
@@ -243,7 +255,8 @@ def main(args):
 
             load_result = loader.load(file_list, config.cheat_mode, config.dry_run, config.loading_mode, config.wipe_db,
                         config.max_violations, config.temp_folder, config.verbose, split=config.split_transactions,
-                        no_backup=config.no_backup, neo4j_uri=config.neo4j_uri, backup_folder=config.backup_folder)
+                        no_backup=config.no_backup, neo4j_uri=config.neo4j_uri, backup_folder=config.backup_folder,
+                        workers=config.workers)
             
             if load_result == False:
                 if loader.validation_result_file_key != "":
@@ -307,6 +320,19 @@ def main(args):
     if load_result == False:
         sys.exit(1)
 
+def list_data_files(folder, extensions=('.txt', '.tsv')):
+    """
+    List data files in a folder with a single directory scan, hidden files and sub folders are skipped
+    :param folder: folder to scan
+    :param extensions: file extensions to include, files are grouped by extension in given order
+    :return: list of file paths
+    """
+    with os.scandir(folder) as entries:
+        file_list = [entry.path for entry in entries
+                     if not entry.name.startswith('.') and entry.name.endswith(extensions) and entry.is_file()]
+    file_list.sort(key=lambda file_name: extensions.index(os.path.splitext(file_name)[1]))
+    return file_list
+
 def confirm_deletion(message):
     print(message)
     confirm = input('Type "yes" and press enter to proceed (You\'ll LOSE DATA!!!), press enter to cancel:')
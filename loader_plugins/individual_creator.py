@@ -79,11 +79,12 @@ class IndividualCreator:
         result = session.run(statement, {UUID: uuid})
         if result:
             i_id = result.single()
-            count = result.consume().counters.nodes_created
+            counters = result.consume().counters
+            count = counters.nodes_created
             self.nodes_created += count
             # count the updated nodes
             update_count = 0
-            if result.consume().counters.nodes_created == 0 and result.consume().counters._contains_updates:
+            if count == 0 and counters._contains_updates:
                 update_count = 1
             self.nodes_updated += update_count
             self.nodes_stat[INDIVIDUAL_NODE] = self.nodes_stat.get(INDIVIDUAL_NODE, 0) + count
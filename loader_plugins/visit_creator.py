@@ -79,11 +79,12 @@ class VisitCreator:
         result = session.run(statement, {"node_id": node_id, "date": date,
                                          UUID: self.schema.get_uuid_for_node(VISIT_NODE, node_id)})
         if result:
-            count = result.consume().counters.nodes_created
+            counters = result.consume().counters
+            count = counters.nodes_created
             self.nodes_created += count
             #count the updated nodes
             update_count = 0
-            if result.consume().counters.nodes_created == 0 and result.consume().counters._contains_updates:
+            if count == 0 and counters._contains_updates:
                 update_count = 1
             self.nodes_updated += update_count
             self.nodes_stat[VISIT_NODE] = self.nodes_stat.get(VISIT_NODE, 0) + count
@@ -32,7 +32,8 @@ def load_data(
         max_violation = 1000000,
         mode = "upsert",
         split_transaction = False,
-        plugins = []
+        plugins = [],
+        workers = 1
     ):
 
     params = Config(
@@ -57,7 +58,8 @@ def load_data(
         split_transaction,
         upload_log_dir,
         plugins,
-        temp_folder
+        temp_folder,
+        workers
     )
     main(params)
 
@@ -85,7 +87,8 @@ class Config:
             split_transaction,
             upload_log_dir,
             plugins,
-            temp_folder
+            temp_folder,
+            workers
     ):
         self.dataset = dataset
         self.uri = uri
@@ -109,6 +112,7 @@ class Config:
         self.upload_log_dir = upload_log_dir
         self.plugins = []
         self.temp_folder = temp_folder
+        self.workers = workers
         for plugin in plugins:
             self.plugins.append(PluginConfig(plugin))
 
@@ -1,8 +1,13 @@
 import unittest
+import io
 import os
-from bento.common.utils import get_logger, removeTrailingSlash, UUID
-from data_loader import DataLoader
+import sys
+import tempfile
+from types import SimpleNamespace
+from bento.common.utils import get_logger, removeTrailingSlash, UUID, UPSERT_MODE, NEW_MODE
+from data_loader import DataLoader, check_encoding, NODE_PROPERTY, PARENT_POINTER, READ_BUFFER_SIZE
 from icdc_schema import ICDC_Schema
+from loader import list_data_files
 from props import Props
 from neo4j import GraphDatabase
 
@@ -113,6 +118,247 @@ class TestLoader(unittest.TestCase):
         obj = self.loader.prepare_node({'type': 'file', 'file_size': ' 15 '})
         self.assertEqual(obj['file_size'], 15)
 
+    def test_check_encoding(self):
+        with tempfile.TemporaryDirectory() as folder:
+            file_name = os.path.join(folder, 'data.txt')
+            with open(file_name, 'wb') as file:
+                file.write('type\tname\ncase\tcaf\u00e9\n'.encode('windows-1252'))
+            self.assertEqual(check_encoding(file_name), 'windows-1252')
+            # Multi-byte characters split between two reads are still UTF-8
+            with open(file_name, 'wb') as file:
+                file.write(b'a' * (READ_BUFFER_SIZE - 1) + 'caf\u00e9'.encode('utf-8')[-2:])
+            self.assertEqual(check_encoding(file_name), 'utf-8')
+
+    def test_read_data_file(self):
+        # Header and values are stripped, empty lines are skipped, short rows are padded with None
+        content = ' type \t case_id \n\ncase\t 1 \ncase\n'
+        # A quoted value with a line break is in one row, values beyond header are dropped
+        content += '"case\nx"\t2\textra\ncase\t3\t\n'
+        with self.assertLogs(self.loader.log, 'WARNING') as logs:
+            rows = list(self.loader.read_data_file(io.StringIO(content, newline='')))
+        self.assertListEqual(rows, [
+            (2, {'type': 'case', 'case_id': '1'}),
+            (3, {'type': 'case', 'case_id': None}),
+            (4, {'type': 'case\nx', 'case_id': '2'}),
+            (5, {'type': 'case', 'case_id': '3'})
+        ])
+        # Values beyond header are reported with the same line number
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('Line: 4:', logs.output[0])
+        self.assertIn('extra', logs.output[0])
+        # Column names are interned, so rows of all files share the same keys
+        key = next(key for key in rows[0][1] if key == 'case_id')
+        self.assertIs(key, sys.intern('case_id'))
+        # Rows with only whitespace are skipped, but still counted in line numbers
+        rows = list(self.loader.read_data_file(io.StringIO('type\tcase_id\n \t \ncase\t1\n\t\n\ncase\t2\n', newline='')))
+        self.assertListEqual(rows, [(3, {'type': 'case', 'case_id': '1'}), (5, {'type': 'case', 'case_id': '2'})])
+        # NUL characters are removed
+        rows = list(self.loader.read_data_file(io.StringIO('type\tcase_id\ncase\t4\x00\n', newline='')))
+        self.assertListEqual(rows, [(2, {'type': 'case', 'case_id': '4'})])
+        # Empty file
+        self.assertListEqual(list(self.loader.read_data_file(io.StringIO('', newline=''))), [])
+
+    def test_get_column_info(self):
+        self.assertTupleEqual(self.loader.get_column_info('case_id'), (NODE_PROPERTY, None, 'case_id'))
+        self.assertTupleEqual(self.loader.get_column_info('cohort.cohort_id'), (PARENT_POINTER, 'cohort', 'cohort_id'))
+        self.assertTupleEqual(self.loader.get_column_info('cohort.'), (NODE_PROPERTY, None, 'cohort.'))
+        self.assertTupleEqual(self.loader.get_column_info('of_case$prop'), (NODE_PROPERTY, None, 'of_case$prop'))
+        # Results are cached
+        self.assertIs(self.loader.get_column_info('cohort.cohort_id'), self.loader.get_column_info('cohort.cohort_id'))
+
+    def test_list_data_files(self):
+        with tempfile.TemporaryDirectory() as folder:
+            for name in ['b.tsv', 'a.txt', '.hidden.txt', 'c.csv']:
+                with open(os.path.join(folder, name), 'w') as file:
+                    file.write('type\n')
+            os.mkdir(os.path.join(folder, 'folder.txt'))
+            self.assertListEqual(list_data_files(folder),
+                                 [os.path.join(folder, 'a.txt'), os.path.join(folder, 'b.tsv')])
+            self.assertListEqual(list_data_files(folder, ('.txt',)), [os.path.join(folder, 'a.txt')])
+
+
+class FakeResult:
+    """
+    Result of a statement run by FakeSession, records are dicts
+    """
+    def __init__(self, records=None, **counters):
+        self.records = records or []
+        self.counters = SimpleNamespace(nodes_created=0, nodes_deleted=0, relationships_created=0,
+                                        relationships_deleted=0)
+        for name, value in counters.items():
+            setattr(self.counters, name, value)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def data(self):
+        return self.records
+
+    def single(self):
+        return self.records[0] if self.records else None
+
+    def consume(self):
+        return self
+
+
+class FakeSession:
+    """
+    Stands in for a Neo4j session or transaction, statements are recorded and answered with given results in order
+    """
+    def __init__(self, results=None):
+        self.results = list(results or [])
+        self.statements = []
+        self.transactions = 0
+
+    def run(self, statement, parameters=None):
+        self.statements.append((statement, parameters))
+        return self.results.pop(0) if self.results else FakeResult()
+
+    def write_transaction(self, transaction_function, *args):
+        self.transactions += 1
+        return transaction_function(self, *args)
+
+    def begin_transaction(self):
+        return self
+
+    def commit(self):
+        pass
+
+
+class TestBatchLoading(unittest.TestCase):
+    """
+    Batch loading tests, statements are sent to a FakeSession, so they don't need a Neo4j instance
+    """
+    def setUp(self):
+        props = Props('../config/props-icdc.yml')
+        self.schema = ICDC_Schema(['data/icdc-model.yml', 'data/icdc-model-props.yml'], props)
+        self.loader = DataLoader(None, self.schema)
+        self.loader.nodes_stat_updated = {}
+        temp_folder = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_folder.cleanup)
+        self.temp_folder = temp_folder.name
+
+    def write_data_file(self, content):
+        file_name = os.path.join(self.temp_folder, 'data.txt')
+        with open(file_name, 'w') as file:
+            file.write(content)
+        return file_name
+
+    def test_load_node_batch(self):
+        rows = [{'case_id': '1'}, {'case_id': '2'}, {'case_id': '3'}]
+        # Rows that didn't create a node updated an existing one
+        session = FakeSession([FakeResult(nodes_created=2)])
+        self.assertTupleEqual(self.loader.load_node_batch(session, UPSERT_MODE, 'case', 'case_id', rows), (2, 1, []))
+        self.assertEqual(len(session.statements), 1)
+        self.assertListEqual(session.statements[0][1]['rows'], rows)
+        # Ids are checked against DB before nodes are created
+        session = FakeSession([FakeResult(), FakeResult(nodes_created=3)])
+        self.assertTupleEqual(self.loader.load_node_batch(session, NEW_MODE, 'case', 'case_id', rows), (3, 0, []))
+        self.assertListEqual(session.statements[0][1]['values'], ['1', '2', '3'])
+        self.assertTupleEqual(self.loader.load_node_batch(session, UPSERT_MODE, 'case', 'case_id', []), (0, 0, []))
+
+    def test_save_node_batches(self):
+        batches = {('case', 'case_id'): [{'case_id': '1'}, {'case_id': '2'}, {'case_id': '3'}]}
+        records = [{'node_id': '1', 'internal_id': 11}, {'node_id': '2', 'internal_id': 12},
+                   {'node_id': '3', 'internal_id': 13}]
+        session = FakeSession([FakeResult(records, nodes_created=2)])
+        self.assertTupleEqual(self.loader.save_node_batches(session, UPSERT_MODE, batches, split=True), (2, 1))
+        self.assertEqual(session.transactions, 1)
+        self.assertDictEqual(batches, {})
+        self.assertEqual(self.loader.nodes_created, 2)
+        self.assertEqual(self.loader.nodes_updated, 1)
+        self.assertDictEqual(self.loader.nodes_stat, {'case': 2})
+        self.assertDictEqual(self.loader.nodes_stat_updated, {'case': 1})
+        # Internal ids are kept for relationships
+        self.assertDictEqual(self.loader.node_ids, {('case', '1'): 11, ('case', '2'): 12, ('case', '3'): 13})
+
+    def test_statements_cached(self):
+        # Statements are only built once for each label and property names
+        self.assertIs(self.loader.get_upsert_statement('case', 'case_id'),
+                      self.loader.get_upsert_statement('case', 'case_id'))
+        self.assertNotEqual(self.loader.get_upsert_statement('case', 'case_id'),
+                            self.loader.get_upsert_statement('cohort', 'cohort_description'))
+        self.assertIs(self.loader.get_relationship_statement('case', 'case_id', 'member_of', 'cohort',
+                                                             'cohort_description', True),
+                      self.loader.get_relationship_statement('case', 'case_id', 'member_of', 'cohort',
+                                                             'cohort_description', True))
+        self.assertNotEqual(self.loader.get_relationship_statement('case', 'case_id', 'member_of', 'cohort',
+                                                                   'cohort_description', True),
+                            self.loader.get_relationship_statement('case', 'case_id', 'member_of', 'cohort',
+                                                                   'cohort_description', False))
+
+    def test_load_nodes_new_mode(self):
+        file_name = self.write_data_file('type\tcase_id\ncase\t1\ncase\t2\ncase\t1\n')
+        # Duplicate ids are found while first row is still waiting in a batch
+        session = FakeSession()
+        with self.assertRaisesRegex(Exception, 'Line: 4: .* exists'):
+            self.loader.load_nodes(session, file_name, NEW_MODE)
+        self.assertFalse([statement for statement, _ in session.statements if statement.startswith('UNWIND')])
+        # Nodes already in DB are reported with the first line they are in
+        file_name = self.write_data_file('type\tcase_id\ncase\t1\ncase\t2\ncase\t3\n')
+        session = FakeSession([FakeResult([{'value': '3'}, {'value': '2'}])])
+        with self.assertRaisesRegex(Exception, 'Line: 3: .* exists'):
+            self.loader.load_nodes(session, file_name, NEW_MODE)
+        self.assertEqual(len(session.statements), 1)
+
+    def test_get_workers(self):
+        file_list = [self.write_data_file('type\tcase_id\ncase\t1\n')]
+        constraints = [{'type': 'UNIQUENESS', 'labelsOrTypes': ['case'], 'properties': ['case_id']}]
+        self.assertEqual(self.loader.get_workers(FakeSession([FakeResult(constraints)]), file_list, 4, True), 4)
+        # Files can only be loaded in parallel in split transactions mode
+        with self.assertLogs(self.loader.log, 'WARNING'):
+            self.assertEqual(self.loader.get_workers(FakeSession([FakeResult(constraints)]), file_list, 4, False), 1)
+        # No constraints in DB, e.g. id field of case already had an index
+        with self.assertLogs(self.loader.log, 'WARNING') as logs:
+            self.assertEqual(self.loader.get_workers(FakeSession(), file_list, 4, True), 1)
+        self.assertIn('(:case { case_id })', logs.output[0])
+        # Id field of cohort doesn't have a constraint
+        file_list.append(os.path.join(self.temp_folder, 'cohort.txt'))
+        with open(file_list[-1], 'w') as file:
+            file.write('type\tcohort_description\ncohort\tA\n')
+        with self.assertLogs(self.loader.log, 'WARNING') as logs:
+            self.assertEqual(self.loader.get_workers(FakeSession([FakeResult(constraints)]), file_list, 4, True), 1)
+        self.assertIn('(:cohort { cohort_description })', logs.output[0])
+        self.assertNotIn('(:case', logs.output[0])
+
+    def test_load_relationships_repeated_child(self):
+        file_name = self.write_data_file('type\tcase_id\tcohort.cohort_description\n'
+                                         'case\tC1\tA\ncase\tC2\tA\ncase\tC1\tB\n')
+        session = FakeSession([FakeResult([{'line': 2}, {'line': 3}], relationships_created=2),
+                               FakeResult([{'line': 4}], relationships_created=1)])
+        self.assertTrue(self.loader.load_relationships(session, file_name, UPSERT_MODE))
+        # Rows of C1 are sent in different batches, so relationship to the first parent is removed by the second one
+        self.assertListEqual([[row['line'] for row in parameters['rows']] for _, parameters in session.statements],
+                             [[2, 3], [4]])
+        self.assertEqual(self.loader.relationships_created, 3)
+
+    def test_load_relationships_by_internal_id(self):
+        self.loader.node_ids = {('case', 'C1'): 1, ('cohort', 'A'): 2}
+        file_name = self.write_data_file('type\tcase_id\tcohort.cohort_description\ncase\tC1\tA\n')
+        session = FakeSession([FakeResult([{'line': 2}], relationships_created=1)])
+        self.loader.load_relationships(session, file_name, UPSERT_MODE)
+        statement, parameters = session.statements[0]
+        self.assertIn('id(m) = row.parent_internal_id', statement)
+        self.assertEqual(parameters['rows'][0]['parent_internal_id'], 2)
+        self.assertEqual(parameters['rows'][0]['node_internal_id'], 1)
+        # Internal ids are kept by id fields, parents pointed to by other properties are matched by the property
+        file_name = self.write_data_file('type\tcase_id\tcohort.cohort_id\ncase\tC1\tA\n')
+        session = FakeSession([FakeResult([{'line': 2}], relationships_created=1)])
+        self.loader.load_relationships(session, file_name, UPSERT_MODE)
+        statement, parameters = session.statements[0]
+        self.assertIn('(m:cohort { cohort_id: row.parent_id })', statement)
+        self.assertNotIn('parent_internal_id', parameters['rows'][0])
+
+    def test_load_relationships_missing_parent(self):
+        file_name = self.write_data_file('type\tcase_id\tcohort.cohort_description\ncase\tC1\tA\ncase\tC2\tX\n')
+        # Only line 2 found its parent
+        session = FakeSession([FakeResult([{'line': 2}], relationships_created=1)])
+        with self.assertLogs(self.loader.log, 'WARNING') as logs:
+            with self.assertRaisesRegex(Exception, 'Line: 3: No parents found'):
+                self.loader.load_relationships(session, file_name, UPSERT_MODE)
+        self.assertEqual(len(session.statements), 1)
+        self.assertIn('Line: 3: Parent node (:cohort {cohort_description: "X"} not found', logs.output[0])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,5 @@
 import unittest
-from icdc_schema import ICDC_Schema
+from icdc_schema import ICDC_Schema, is_parent_pointer
 from props import Props
 
 
@@ -48,6 +48,18 @@ class TestSchema(unittest.TestCase):
         self.assertEqual(self.schema.get_id_field({'type': 'file'}), 'uuid')
         self.assertEqual(self.schema.get_id_field({'type': 'demographic'}), 'uuid')
 
+    def test_is_parent_pointer(self):
+        self.assertTrue(is_parent_pointer('case.case_id'))
+        self.assertFalse(is_parent_pointer('case_id'))
+        self.assertFalse(is_parent_pointer('case.'))
+        self.assertFalse(is_parent_pointer('case.case_id.extra'))
+
+    def test_is_relationship_property(self):
+        self.assertFalse(self.schema.is_relationship_property('case_id'))
+        self.assertFalse(self.schema.is_relationship_property('case.case_id'))
+        # Relationship properties are not recognized with "$" delimiter, they are loaded as node properties
+        self.assertFalse(self.schema.is_relationship_property('of_case$prop'))
+
 
 if __name__ == '__main__':
     unittest.main()